@@ -78,7 +78,11 @@ class PasswordContext:
     """Password hashing context."""
     
     def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__rounds=settings.bcrypt_rounds
+        )
     
     def hash_password(self, password: str) -> str:
         """Hash a password."""
@@ -32,6 +32,7 @@ class Settings(BaseSettings):
     # Security
     secret_key: str = Field(default="test-secret-key-for-development-only-32-chars-minimum", env="SECRET_KEY")
     access_token_expire_minutes: int = Field(default=30, env="ACCESS_TOKEN_EXPIRE_MINUTES")
+    bcrypt_rounds: int = Field(default=12, env="BCRYPT_ROUNDS")  # Password hashing cost factor
     allowed_hosts: List[str] = Field(default=["localhost", "127.0.0.1"], env="ALLOWED_HOSTS")
     
     # ACP (Authorization Credential Protocol) Configuration
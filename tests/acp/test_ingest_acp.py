@@ -49,7 +49,6 @@ async def test_customer(db_session):
     )
     db_session.add(customer)
     await db_session.commit()
-    await db_session.refresh(customer)
     return customer
 
 
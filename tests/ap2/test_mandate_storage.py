@@ -10,15 +10,14 @@ import pytest
 import os
 from decimal import Decimal
 from datetime import datetime, timedelta, timezone
-from httpx import AsyncClient
 from sqlalchemy import select
+from passlib.context import CryptContext
 
 # Set test environment
 os.environ['SECRET_KEY'] = 'test-secret-key-minimum-32-characters-long'
 os.environ['ENVIRONMENT'] = 'testing'
 os.environ['DATABASE_URL'] = 'sqlite+aiosqlite:///./test.db'
 
-from app.main import app
 from app.models.authorization import Authorization, ProtocolType
 from app.models.mandate import Mandate
 from app.models.customer import Customer
@@ -28,6 +27,10 @@ from app.core.database import AsyncSessionLocal
 from app.core.auth import AuthService
 
 
+# Low-cost bcrypt context; the storage tests never check password strength
+_pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4)
+
+
 @pytest.fixture
 async def db_session():
     """Create database session for tests."""
@@ -35,9 +38,9 @@ async def db_session():
         yield session
 
 
-@pytest.fixture
-async def test_customer(db_session):
-    """Create test customer."""
+@pytest.fixture(scope="module")
+async def test_customer():
+    """Create test customer shared by the module."""
     import uuid
     unique_id = str(uuid.uuid4())[:8]
     
@@ -47,47 +50,44 @@ async def test_customer(db_session):
         email=f"ap2-{unique_id}@test.com",
         is_active=True
     )
-    db_session.add(customer)
-    await db_session.commit()
-    await db_session.refresh(customer)
+    async with AsyncSessionLocal() as session:
+        session.add(customer)
+        await session.commit()
     return customer
 
 
-@pytest.fixture
-async def test_user(db_session, test_customer):
-    """Create test user for authentication."""
+@pytest.fixture(scope="module")
+async def test_user(test_customer):
+    """Create test user for authentication, shared by the module."""
     import uuid
-    from passlib.context import CryptContext
-    
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
     
     user = User(
         email=f"ap2-user-{uuid.uuid4().hex[:8]}@test.com",
-        password_hash=pwd_context.hash("testpassword123"),
+        password_hash=_pwd_ctx.hash("testpassword123"),
         tenant_id=test_customer.tenant_id,
         role=UserRole.ADMIN,
         status=UserStatus.ACTIVE,
         is_active=True,
         email_verified=True
     )
-    db_session.add(user)
-    await db_session.commit()
-    await db_session.refresh(user)
+    async with AsyncSessionLocal() as session:
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
     return user
 
 
-@pytest.fixture
-def auth_token(test_user, db_session):
-    """Create authentication token."""
-    auth_service = AuthService(db_session)
-    return auth_service.create_access_token(test_user)
+@pytest.fixture(scope="module")
+def auth_token(test_user):
+    """Create authentication token once per module; it does not change per test."""
+    return AuthService(None).create_access_token(test_user)
 
 
 class TestAP2MandateStorageInAuthorizations:
     """Test that AP2 mandates are stored in authorizations table."""
     
     @pytest.mark.asyncio
-    async def test_mandate_stored_as_ap2_authorization(self, test_customer, auth_token, db_session):
+    async def test_mandate_stored_as_ap2_authorization(self, ac, test_customer, auth_token, db_session):
         """Test that creating a mandate stores it in authorizations table with protocol='AP2'."""
         # Create a valid mock JWT (will fail verification but that's OK for storage test)
         mock_jwt = "eyJhbGciOiJFUzI1NiIsInR5cCI6IkpXVCJ9.eyJpc3MiOiJkaWQ6d2ViOmJhbmsuZXhhbXBsZS5jb20iLCJzdWIiOiJkaWQ6ZXhhbXBsZTp1c2VyLTEyMyIsInNjb3BlIjoicGF5bWVudC5yZWN1cnJpbmciLCJhbW91bnRfbGltaXQiOiIxMDAwLjAwIiwiZXhwIjoxNzY0NTQxMjAwfQ.test"
@@ -101,41 +101,38 @@ class TestAP2MandateStorageInAuthorizations:
             "tenant_id": test_customer.tenant_id
         }
         
-        async with AsyncClient(app=app, base_url="http://test") as client:
-            response = await client.post(
-                "/api/v1/authorizations/",
-                json=payload,
-                headers={"Authorization": f"Bearer {auth_token}"}
-            )
+        response = await ac.post(
+            "/api/v1/authorizations/",
+            json=payload,
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        
+        # May fail verification, but let's check if it processes AP2
+        # If it fails verification, it should still attempt to store
+        # For this test, we mainly care that when successful, it uses authorizations table
+        
+        if response.status_code == 201:
+            data = response.json()
+            auth_id = data["id"]
             
-            # May fail verification, but let's check if it processes AP2
-            # If it fails verification, it should still attempt to store
-            # For this test, we mainly care that when successful, it uses authorizations table
+            # Verify row exists in authorizations table
+            authorization = await db_session.get(Authorization, auth_id)
+            assert authorization is not None
             
-            if response.status_code == 201:
-                data = response.json()
-                auth_id = data["id"]
-                
-                # Verify row exists in authorizations table
-                result = await db_session.execute(
-                    select(Authorization).where(Authorization.id == auth_id)
-                )
-                authorization = result.scalar_one()
-                
-                # Assert stored as AP2 protocol
-                assert authorization.protocol == ProtocolType.AP2.value
-                assert authorization.raw_payload.get('vc_jwt') == mock_jwt
-                
-                # Assert audit log shows AP2 protocol
-                result = await db_session.execute(
-                    select(AuditLog).where(
-                        AuditLog.mandate_id == auth_id,
-                        AuditLog.event_type == "CREATED"
-                    )
+            # Assert stored as AP2 protocol
+            assert authorization.protocol == ProtocolType.AP2.value
+            assert authorization.raw_payload.get('vc_jwt') == mock_jwt
+            
+            # Assert audit log shows AP2 protocol
+            result = await db_session.execute(
+                select(AuditLog).where(
+                    AuditLog.mandate_id == auth_id,
+                    AuditLog.event_type == "CREATED"
                 )
-                audit = result.scalar_one_or_none()
-                if audit:
-                    assert audit.details.get('protocol') == 'AP2'
+            )
+            audit = result.scalar_one_or_none()
+            if audit:
+                assert audit.details.get('protocol') == 'AP2'
     
     @pytest.mark.asyncio
     async def test_legacy_mandate_endpoint_uses_authorizations_table(self, test_customer, db_session):
@@ -170,28 +167,46 @@ class TestAP2MandateStorageInAuthorizations:
             verification_status='VALID'
         )
         db_session.add(authorization)
-        await db_session.commit()
+        # Flush only: the query below runs in the same transaction
+        await db_session.flush()
         
         # Query should work via mandate_view (if it exists)
         # Or directly via Authorization model
-        result = await db_session.execute(
-            select(Authorization).where(
-                Authorization.id == authorization.id,
-                Authorization.protocol == 'AP2'
-            )
-        )
-        stored_auth = result.scalar_one()
+        stored_auth = await db_session.get(Authorization, authorization.id)
+        assert stored_auth is not None
         
         assert stored_auth.protocol == 'AP2'
         assert stored_auth.issuer == 'did:web:test.com'
         assert stored_auth.raw_payload['vc_jwt'] == 'test.jwt.token'
 
 
+class _FakeSession:
+    """Stand-in for AsyncSession that keeps added objects and counts commits."""
+    
+    def __init__(self):
+        self.added = []
+        self.commits = 0
+    
+    def add(self, obj):
+        self.added.append(obj)
+    
+    async def commit(self):
+        self.commits += 1
+    
+    async def refresh(self, obj):
+        pass
+
+
 class TestAP2MandateAuditEvents:
     """Test that AP2 mandates have proper audit events."""
     
+    @pytest.fixture
+    def fake_db_session(self):
+        """In-memory session; these checks need no real SQL."""
+        return _FakeSession()
+    
     @pytest.mark.asyncio
-    async def test_ap2_creation_audit_event(self, test_customer, db_session):
+    async def test_ap2_creation_audit_event(self, fake_db_session):
         """Test that creating AP2 authorization generates CREATED audit event."""
         import uuid
         
@@ -205,14 +220,13 @@ class TestAP2MandateAuditEvents:
             expires_at=datetime.now(timezone.utc) + timedelta(days=30),
             status='VALID',
             raw_payload={'vc_jwt': 'test.token'},
-            tenant_id=test_customer.tenant_id
+            tenant_id='test-tenant-ap2-audit'
         )
-        db_session.add(authorization)
-        await db_session.commit()
+        fake_db_session.add(authorization)
         
         # Manually log CREATED event (simulating what the service does)
         from app.services.audit_service import AuditService
-        audit_service = AuditService(db_session)
+        audit_service = AuditService(fake_db_session)
         await audit_service.log_event(
             mandate_id=str(authorization.id),
             event_type="CREATED",
@@ -223,15 +237,14 @@ class TestAP2MandateAuditEvents:
             }
         )
         
-        # Verify audit log
-        result = await db_session.execute(
-            select(AuditLog).where(
-                AuditLog.mandate_id == str(authorization.id),
-                AuditLog.event_type == "CREATED"
-            )
-        )
-        audit_log = result.scalar_one()
+        # Verify the audit row written to the session
+        audit_logs = [obj for obj in fake_db_session.added if isinstance(obj, AuditLog)]
+        assert len(audit_logs) == 1
+        assert fake_db_session.commits == 1
         
+        audit_log = audit_logs[0]
+        assert audit_log.mandate_id == str(authorization.id)
+        assert audit_log.event_type == "CREATED"
         assert audit_log.details["protocol"] == "AP2"
         assert audit_log.details["issuer"] == "did:web:issuer.com"
 
@@ -1,9 +1,25 @@
 """
 Pytest configuration and fixtures for test suite.
+
+When iterating on a single module, collection is dominated by loading every
+installed pytest plugin. Skip autoloading and name the one plugin the suite
+needs:
+
+    PYTEST_DISABLE_PLUGIN_AUTOLOAD=1 python -m pytest -p pytest_asyncio.plugin tests/test_alert_api.py
 """
 import pytest
 import os
 import asyncio
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# uvloop ships with uvicorn[standard] on non-Windows platforms
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
 
 # Set test environment variables BEFORE importing app modules
 os.environ.setdefault('ENVIRONMENT', 'testing')
@@ -12,42 +28,86 @@ os.environ.setdefault('SECRET_KEY', 'test-secret-key-for-development-only-32-cha
 os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///./test.db')
 os.environ.setdefault('ACP_WEBHOOK_SECRET', 'test-acp-webhook-secret-for-testing-only')
 os.environ.setdefault('ACP_ENABLE', 'true')
+# Minimum bcrypt cost: tests never rely on password-hashing strength
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+# Under pytest-xdist every worker uses its own database file, since the
+# session-scoped schema setup/teardown would otherwise race across workers.
+# Workers inherit the controller's environment, so override the default here.
+_worker = os.environ.get('PYTEST_XDIST_WORKER')
+_worker_db_path = None
+if _worker and os.environ['DATABASE_URL'] == 'sqlite+aiosqlite:///./test.db':
+    _worker_db_path = f'./test_{_worker}.db'
+    os.environ['DATABASE_URL'] = f'sqlite+aiosqlite:///{_worker_db_path}'
 
 # Now import app modules after setting environment variables
 from app.main import app
-from app.core.database import AsyncSessionLocal, Base, engine
+from app.core.database import Base, engine
+from app.core.login_protection import login_protection
+from app.core.rate_limiting import limiter
 
 
 @pytest.fixture(scope="session")
 def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
+    """Create the event loop for the test session, backed by uvloop when available."""
+    if UVLOOP_AVAILABLE:
+        loop = uvloop.new_event_loop()
+    else:
+        loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
     loop.close()
 
 
-@pytest.fixture(autouse=True)
+@pytest.fixture(scope="session", autouse=True)
 async def setup_database():
-    """Set up database tables for each test."""
+    """Set up database tables once for the whole test session."""
     # Create all tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
     yield
     
-    # Clean up tables after test
+    # Clean up tables after the session
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    
+    # Per-worker database files are not reused by later runs
+    if _worker_db_path:
+        await engine.dispose()
+        if os.path.exists(_worker_db_path):
+            os.remove(_worker_db_path)
 
 
 @pytest.fixture
 async def db_session():
-    """Create database session for tests."""
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+    """
+    Create database session for tests.
+    
+    The session is bound to a connection whose outer transaction is rolled
+    back at teardown, so commits made by the test only release a SAVEPOINT
+    and nothing leaks into the next test.
+    """
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        await conn.begin_nested()
+        session = AsyncSession(bind=conn, expire_on_commit=False)
+
+        @event.listens_for(session.sync_session, "after_transaction_end")
+        def restart_savepoint(sync_session, transaction):
+            if transaction.nested and not transaction._parent.nested:
+                sync_session.begin_nested()
+
+        yield session
+
+        await session.close()
+        await trans.rollback()
+
+
+@pytest.fixture(scope="session")
+async def ac():
+    """Async HTTP client shared by the whole session, driving the app in-process."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
 
 
 @pytest.fixture(autouse=True)
@@ -71,5 +131,10 @@ def reset_app_state():
     Reset any app-level state between tests.
     """
     yield
-    # Any additional cleanup can go here
+    # Rate-limit counters and login lockouts are process-wide; clear them so
+    # the outcome of a test does not depend on which files ran before it on
+    # the same worker.
+    limiter.reset()
+    login_protection.failed_attempts.clear()
+    login_protection.lockouts.clear()
 
@@ -5,41 +5,54 @@ Integration Test Configuration
 Shared fixtures for integration tests using real database.
 """
 import os
+import uuid
+from typing import Dict, Tuple
 import pytest
-import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from httpx import AsyncClient
+from sqlalchemy.pool import NullPool
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.backends import default_backend
+from jwt.algorithms import RSAAlgorithm
 
 # Set test environment
+# Each pytest-xdist worker gets its own in-memory database so workers never
+# contend on a shared SQLite file.
+_worker = os.environ.get('PYTEST_XDIST_WORKER', 'gw0')
 os.environ['SECRET_KEY'] = 'integration-test-secret-key-minimum-32-characters-long'
 os.environ['ENVIRONMENT'] = 'testing'
-os.environ['DATABASE_URL'] = 'sqlite+aiosqlite:///./test_integration.db'
+os.environ['DATABASE_URL'] = (
+    f'sqlite+aiosqlite:///file:test_{_worker}?mode=memory&cache=shared&uri=true'
+)
 
 from app.main import app
 from app.core.database import Base, get_db
 from app.models.customer import Customer
 from app.models.user import User, UserRole, UserStatus
-from app.services.user_service import UserService
+from app.core.auth import AuthService, PasswordContext
+from app.services.truststore_service import truststore_service
 
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create event loop for session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+_password_context = PasswordContext()
 
 
 @pytest.fixture(scope="session")
 async def test_engine():
     """Create test database engine."""
+    # Every session opens its own connection to the shared-cache database, so
+    # transactions from concurrent sessions and requests never interleave on
+    # one connection
     engine = create_async_engine(
         os.environ['DATABASE_URL'],
         echo=False,
+        poolclass=NullPool,
         connect_args={"check_same_thread": False}
     )
     
+    # An in-memory database lives only while a connection is open, so one
+    # idle keeper connection holds it for the whole session
+    keeper = await engine.connect()
+    
     # Create all tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
@@ -51,9 +64,40 @@ async def test_engine():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
     
+    await keeper.close()
     await engine.dispose()
 
 
+@pytest.fixture(scope="session")
+def rsa_signing_key():
+    """RSA key for signing test JWT-VCs, generated once per session."""
+    return rsa.generate_private_key(
+        public_exponent=65537,
+        key_size=2048,
+        backend=default_backend()
+    )
+
+
+@pytest.fixture(scope="session")
+def jwk_set(rsa_signing_key):
+    """Public JWK set for rsa_signing_key, materialized once per session."""
+    jwk = RSAAlgorithm.to_jwk(rsa_signing_key.public_key(), as_dict=True)
+    jwk.update({"use": "sig", "kid": "integration-key-1", "alg": "RS256"})
+    return {"keys": [jwk]}
+
+
+@pytest.fixture(scope="session")
+def issuer_did():
+    """DID of the test issuer whose keys are in the truststore."""
+    return "did:example:integration-bank"
+
+
+@pytest.fixture(scope="session", autouse=True)
+async def register_test_issuer(issuer_did, jwk_set):
+    """Register the test issuer with the truststore once per session."""
+    await truststore_service.register_issuer(issuer_did, jwk_set)
+
+
 @pytest.fixture
 async def db_session(test_engine):
     """Create database session for each test."""
@@ -63,15 +107,14 @@ async def db_session(test_engine):
         expire_on_commit=False
     )
     
+    # Leaving the context manager closes the session, which already rolls
+    # back anything left open
     async with async_session() as session:
         yield session
-        await session.rollback()
 
 
-@pytest.fixture
-async def test_client(test_engine):
-    """Create test HTTP client."""
-    # Override dependency
+def _override_get_db(test_engine):
+    """Build a get_db override bound to the test engine."""
     async def override_get_db():
         async_session = sessionmaker(
             test_engine,
@@ -81,104 +124,121 @@ async def test_client(test_engine):
         async with async_session() as session:
             yield session
     
-    app.dependency_overrides[get_db] = override_get_db
+    return override_get_db
+
+
+@pytest.fixture
+def test_client(test_engine, ac):
+    """Session-wide HTTP client, bound to the test database for this test."""
+    # The client is shared, but dependency overrides are cleared around
+    # every test, so the database override is applied per test
+    app.dependency_overrides[get_db] = _override_get_db(test_engine)
     
-    async with AsyncClient(app=app, base_url="http://test") as client:
-        yield client
+    yield ac
     
     app.dependency_overrides.clear()
 
 
-@pytest.fixture
-async def test_customer(db_session) -> Customer:
-    """Create test customer."""
-    import uuid
+@pytest.fixture(scope="module")
+async def seed_session(test_engine):
+    """Session for rows shared by every test in a module."""
+    async_session = sessionmaker(
+        test_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+    
+    async with async_session() as session:
+        yield session
+
+
+async def seed(db: AsyncSession, *objs):
+    """Insert all given rows with a single commit."""
+    db.add_all(objs)
+    await db.commit()
+    return objs
+
+
+def _make_user(email: str, password: str, full_name: str, tenant_id: str, role: UserRole) -> User:
+    """Build an active, verified user row without going through UserService."""
+    return User(
+        id=str(uuid.uuid4()),
+        email=email,
+        password_hash=_password_context.hash_password(password),
+        full_name=full_name,
+        tenant_id=tenant_id,
+        role=role,
+        status=UserStatus.ACTIVE,
+        email_verified=True,
+        failed_login_attempts="0"
+    )
+
+
+@pytest.fixture(scope="module")
+async def test_customer(seed_session) -> Customer:
+    """Create test customer shared by the module."""
     customer = Customer(
         tenant_id=str(uuid.uuid4()),
         name="Integration Test Corp",
         email="integration@test.com",
         is_active=True
     )
-    db_session.add(customer)
-    await db_session.commit()
-    await db_session.refresh(customer)
+    await seed(seed_session, customer)
     return customer
 
 
-@pytest.fixture
-async def test_admin_user(db_session, test_customer) -> User:
-    """Create test admin user."""
-    user_service = UserService(db_session)
+@pytest.fixture(scope="module")
+async def test_users(seed_session, test_customer) -> Tuple[User, User]:
+    """Create the admin and regular test users in one commit."""
+    # The database lives for the whole session, so emails must be unique per module
+    unique_id = uuid.uuid4().hex[:8]
     
-    user = await user_service.create_user(
-        email="admin@integration-test.com",
+    admin = _make_user(
+        email=f"admin-{unique_id}@integration-test.com",
         password="AdminPassword123!",
         full_name="Admin User",
         tenant_id=test_customer.tenant_id,
         role=UserRole.ADMIN
     )
-    
-    # Activate user
-    user.status = UserStatus.ACTIVE
-    user.email_verified = True
-    await db_session.commit()
-    await db_session.refresh(user)
-    
-    return user
-
-
-@pytest.fixture
-async def test_regular_user(db_session, test_customer) -> User:
-    """Create test regular user."""
-    user_service = UserService(db_session)
-    
-    user = await user_service.create_user(
-        email="user@integration-test.com",
+    regular = _make_user(
+        email=f"user-{unique_id}@integration-test.com",
         password="UserPassword123!",
         full_name="Regular User",
         tenant_id=test_customer.tenant_id,
         role=UserRole.CUSTOMER_USER
     )
     
-    # Activate user
-    user.status = UserStatus.ACTIVE
-    user.email_verified = True
-    await db_session.commit()
-    await db_session.refresh(user)
-    
-    return user
+    return await seed(seed_session, admin, regular)
 
 
-@pytest.fixture
-async def auth_headers(test_client, test_admin_user):
-    """Get authentication headers for admin user."""
-    response = await test_client.post(
-        "/api/v1/auth/login",
-        json={
-            "email": test_admin_user.email,
-            "password": "AdminPassword123!"
-        }
-    )
-    
-    assert response.status_code == 200
-    token = response.json()["access_token"]
-    
-    return {"Authorization": f"Bearer {token}"}
+@pytest.fixture(scope="module")
+def test_admin_user(test_users) -> User:
+    """Test admin user."""
+    return test_users[0]
 
 
-@pytest.fixture
-async def user_auth_headers(test_client, test_regular_user):
-    """Get authentication headers for regular user."""
-    response = await test_client.post(
-        "/api/v1/auth/login",
-        json={
-            "email": test_regular_user.email,
-            "password": "UserPassword123!"
-        }
-    )
-    
-    assert response.status_code == 200
-    token = response.json()["access_token"]
+@pytest.fixture(scope="module")
+def test_regular_user(test_users) -> User:
+    """Test regular user."""
+    return test_users[1]
+
+
+def _bearer_headers(user: User) -> Dict[str, str]:
+    """Mint an access token in-process and return bearer headers for the user."""
+    # /auth/login is covered by the auth tests; going through it here would
+    # only add a bcrypt check and a full request per fixture
+    token = AuthService(None).create_access_token(user)
     
     return {"Authorization": f"Bearer {token}"}
 
+
+@pytest.fixture(scope="module")
+def auth_headers(test_admin_user):
+    """Get authentication headers for admin user."""
+    return _bearer_headers(test_admin_user)
+
+
+@pytest.fixture(scope="module")
+def user_auth_headers(test_regular_user):
+    """Get authentication headers for regular user."""
+    return _bearer_headers(test_regular_user)
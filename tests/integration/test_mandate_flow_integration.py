@@ -7,60 +7,19 @@ End-to-end tests for mandate creation, verification, and retrieval.
 import pytest
 import jwt
 from datetime import datetime, timedelta
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.backends import default_backend
 
-from app.services.truststore_service import truststore_service
+
+# HMAC key for throwaway tokens that the server rejects before any
+# signature check, so they do not need (much slower) RSA signing
+_SECRET = b"x" * 32
 
 
 @pytest.mark.asyncio
-async def test_complete_mandate_creation_flow(test_client, auth_headers, test_customer):
-    """Test complete flow: register issuer, create mandate, verify, retrieve."""
-    
-    # Step 1: Generate RSA keys for test issuer
-    private_key = rsa.generate_private_key(
-        public_exponent=65537,
-        key_size=2048,
-        backend=default_backend()
-    )
-    
-    public_key = private_key.public_key()
-    public_pem = public_key.public_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PublicFormat.SubjectPublicKeyInfo
-    )
-    
-    # Step 2: Register issuer in truststore
-    issuer_did = "did:example:integration-bank"
-    
-    # Generate proper JWK from the actual RSA key
-    import base64
-    
-    # Get the public key numbers
-    public_numbers = public_key.public_numbers()
-    n = public_numbers.n
-    e = public_numbers.e
-    
-    # Convert to base64url encoded strings
-    n_bytes = n.to_bytes((n.bit_length() + 7) // 8, byteorder='big')
-    e_bytes = e.to_bytes((e.bit_length() + 7) // 8, byteorder='big')
-    
-    # Use base64.urlsafe_b64encode and remove padding
-    n_b64 = base64.urlsafe_b64encode(n_bytes).decode('ascii').rstrip('=')
-    e_b64 = base64.urlsafe_b64encode(e_bytes).decode('ascii').rstrip('=')
-    
-    jwk_set = {
-        "keys": [{
-            "kty": "RSA",
-            "use": "sig",
-            "kid": "integration-key-1",
-            "n": n_b64,
-            "e": e_b64
-        }]
-    }
+async def test_complete_mandate_creation_flow(test_client, auth_headers, test_customer, rsa_signing_key, issuer_did):
+    """Test complete flow: create mandate, verify, retrieve, revoke."""
     
-    await truststore_service.register_issuer(issuer_did, jwk_set)
+    # Steps 1-2: the issuer key is generated and registered in the
+    # truststore once per session by the conftest fixtures
     
     # Step 3: Create JWT-VC mandate
     now = datetime.utcnow()
@@ -77,7 +36,7 @@ async def test_complete_mandate_creation_flow(test_client, auth_headers, test_cu
     
     vc_jwt = jwt.encode(
         payload,
-        private_key,
+        rsa_signing_key,
         algorithm="RS256",
         headers={"kid": "integration-key-1"}
     )
@@ -173,12 +132,6 @@ async def test_mandate_with_expired_token(test_client, auth_headers, test_custom
     """Test mandate creation with expired JWT."""
     
     # Create expired token
-    private_key = rsa.generate_private_key(
-        public_exponent=65537,
-        key_size=2048,
-        backend=default_backend()
-    )
-    
     past = datetime.utcnow() - timedelta(days=1)
     payload = {
         "iss": "did:example:expired-issuer",
@@ -188,7 +141,7 @@ async def test_mandate_with_expired_token(test_client, auth_headers, test_custom
         "scope": "payment.one-time"
     }
     
-    expired_jwt = jwt.encode(payload, private_key, algorithm="RS256")
+    expired_jwt = jwt.encode(payload, _SECRET, algorithm="HS256")
     
     response = await test_client.post(
         "/api/v1/mandates/",
@@ -204,7 +157,7 @@ async def test_mandate_with_expired_token(test_client, auth_headers, test_custom
 
 
 @pytest.mark.asyncio
-async def test_mandate_tenant_isolation(test_client, auth_headers, test_customer, db_session):
+async def test_mandate_tenant_isolation(test_client, auth_headers, test_customer, db_session, rsa_signing_key, issuer_did):
     """Test that mandates are isolated by tenant."""
     
     # Create another tenant
@@ -220,16 +173,7 @@ async def test_mandate_tenant_isolation(test_client, auth_headers, test_customer
     db_session.add(other_tenant)
     await db_session.commit()
     
-    # Create mandate for test_customer
-    private_key = rsa.generate_private_key(
-        public_exponent=65537,
-        key_size=2048,
-        backend=default_backend()
-    )
-    
-    issuer_did = "did:example:isolation-test"
-    await truststore_service.register_issuer(issuer_did, {"keys": []})
-    
+    # Create mandate for test_customer, signed by the session issuer
     now = datetime.utcnow()
     payload = {
         "iss": issuer_did,
@@ -239,7 +183,12 @@ async def test_mandate_tenant_isolation(test_client, auth_headers, test_customer
         "scope": "payment.recurring"
     }
     
-    vc_jwt = jwt.encode(payload, private_key, algorithm="RS256")
+    vc_jwt = jwt.encode(
+        payload,
+        rsa_signing_key,
+        algorithm="RS256",
+        headers={"kid": "integration-key-1"}
+    )
     
     response = await test_client.post(
         "/api/v1/mandates/",
@@ -269,31 +218,30 @@ async def test_mandate_tenant_isolation(test_client, auth_headers, test_customer
 
 
 @pytest.mark.asyncio
-async def test_concurrent_mandate_creation(test_client, auth_headers, test_customer):
+async def test_concurrent_mandate_creation(test_client, auth_headers, test_customer, rsa_signing_key, issuer_did):
     """Test concurrent mandate creation (stress test)."""
     import asyncio
     
-    issuer_did = "did:example:concurrent-test"
-    await truststore_service.register_issuer(issuer_did, {"keys": []})
-    
-    async def create_mandate(index):
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048,
-            backend=default_backend()
+    # Sign every token up front so the gathered requests are not
+    # serialized on CPU-bound crypto inside the event loop
+    now = datetime.utcnow()
+    vc_jwts = [
+        jwt.encode(
+            {
+                "iss": issuer_did,
+                "sub": f"did:example:customer-{index}",
+                "iat": int(now.timestamp()),
+                "exp": int((now + timedelta(days=30)).timestamp()),
+                "scope": "payment.recurring"
+            },
+            rsa_signing_key,
+            algorithm="RS256",
+            headers={"kid": "integration-key-1"}
         )
-        
-        now = datetime.utcnow()
-        payload = {
-            "iss": issuer_did,
-            "sub": f"did:example:customer-{index}",
-            "iat": int(now.timestamp()),
-            "exp": int((now + timedelta(days=30)).timestamp()),
-            "scope": "payment.recurring"
-        }
-        
-        vc_jwt = jwt.encode(payload, private_key, algorithm="RS256")
-        
+        for index in range(10)
+    ]
+    
+    async def create_mandate(vc_jwt):
         response = await test_client.post(
             "/api/v1/mandates/",
             json={
@@ -306,8 +254,7 @@ async def test_concurrent_mandate_creation(test_client, auth_headers, test_custo
         return response.status_code
     
     # Create 10 mandates concurrently
-    results = await asyncio.gather(*[create_mandate(i) for i in range(10)])
+    results = await asyncio.gather(*[create_mandate(vc_jwt) for vc_jwt in vc_jwts])
     
     # All should succeed
     assert all(status == 201 for status in results)
-
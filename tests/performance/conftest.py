@@ -0,0 +1,66 @@
+"""
+Performance Test Configuration
+==============================
+
+Shared signing fixtures for the performance benchmarks.
+"""
+import pytest
+import jwt
+from datetime import datetime
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.backends import default_backend
+from jwt.algorithms import ECAlgorithm
+
+from app.services.truststore_service import truststore_service
+
+
+@pytest.fixture(scope="session")
+def perf_signing_key():
+    """
+    P-256 key for signing benchmark JWT-VCs, generated once per session.
+    
+    The benchmarks measure the request pipeline, not the signature scheme,
+    so they use ES256, whose keys are far cheaper to generate and sign with
+    than 2048-bit RSA.
+    """
+    return ec.generate_private_key(ec.SECP256R1(), default_backend())
+
+
+@pytest.fixture(scope="session")
+def perf_jwk_set(perf_signing_key):
+    """Public JWK set for perf_signing_key, materialized once per session."""
+    jwk = ECAlgorithm.to_jwk(perf_signing_key.public_key(), as_dict=True)
+    jwk.update({"use": "sig", "kid": "perf-key-1", "alg": "ES256"})
+    return {"keys": [jwk]}
+
+
+@pytest.fixture(scope="session")
+def perf_issuer_did():
+    """DID of the benchmark issuer whose keys are in the truststore."""
+    return "did:example:perf-test"
+
+
+@pytest.fixture(scope="session", autouse=True)
+async def register_perf_issuer(perf_issuer_did, perf_jwk_set):
+    """Register the benchmark issuer with the truststore once per session."""
+    await truststore_service.register_issuer(perf_issuer_did, perf_jwk_set)
+
+
+@pytest.fixture(scope="session")
+def perf_signed_jwt(perf_signing_key, perf_issuer_did):
+    """JWT-VC signed once per session for the benchmarks."""
+    now = datetime.utcnow()
+    payload = {
+        "iss": perf_issuer_did,
+        "sub": "did:example:customer",
+        "iat": int(now.timestamp()),
+        "exp": int(now.timestamp()) + 31536000,
+        "scope": "payment.recurring"
+    }
+    
+    return jwt.encode(
+        payload,
+        perf_signing_key,
+        algorithm="ES256",
+        headers={"kid": "perf-key-1"}
+    )
@@ -2,30 +2,50 @@
 """
 Test suite for Audit API endpoints.
 Tests audit log retrieval and search functionality.
+
+Skipping assertion rewriting trims collection time, but a failing assert
+then reports no values: PYTEST_DONT_REWRITE
 """
 
 import pytest
 import uuid
 from datetime import datetime, timedelta
-from unittest.mock import AsyncMock, patch
-from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
 
-from app.main import app
+from app.api.v1.endpoints.audit import router as audit_router
 from app.core.database import get_db
 from app.models.audit import AuditLog
 
 
+def _fake_uuid(n: int) -> str:
+    """Deterministic UUID string for IDs that only need to be well formed."""
+    return str(uuid.UUID(int=n))
+
+
+# Fixed reference time keeps sample data deterministic
+_NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+_MANDATE_ID = _fake_uuid(1)
+
+# The audit endpoints need no middleware or other routers, so the tests
+# drive a router-only app instead of the full application stack
+app = FastAPI()
+app.include_router(audit_router, prefix="/api/v1/audit")
+
+
 class TestAuditAPI:
     """Test cases for audit API endpoints."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def mock_db_session(self):
-        """Mock database session."""
+        """Mock database session shared by the class; tests never reconfigure it."""
         session = AsyncMock()
         
         # Mock the execute method to handle different query types
         def mock_execute(query):
-            mock_result = AsyncMock()
+            mock_result = MagicMock()
             mock_result.scalar_one_or_none.return_value = None
             mock_result.scalars.return_value.all.return_value = []
             return mock_result
@@ -33,74 +53,83 @@ class TestAuditAPI:
         session.execute = mock_execute
         return session
     
-    @pytest.fixture
-    def client(self, mock_db_session):
-        """Create a test client with mocked database."""
+    @pytest.fixture(scope="class")
+    async def client(self, mock_db_session):
+        """In-process ASGI client for the audit app, shared by the class."""
+        # The root conftest only resets overrides on the main app, so this
+        # override can stay in place for the whole class
         app.dependency_overrides[get_db] = lambda: mock_db_session
-        client = TestClient(app)
-        yield client
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            yield client
         app.dependency_overrides.clear()
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def sample_audit_logs(self):
-        """Create sample audit logs for testing."""
-        mandate_id = str(uuid.uuid4())
+        """Sample audit logs shared by the class."""
+        mandate_id = _MANDATE_ID
         return [
             AuditLog(
-                id=str(uuid.uuid4()),
+                id=_fake_uuid(10),
                 mandate_id=mandate_id,
                 event_type="CREATE",
-                timestamp=datetime.utcnow(),
+                timestamp=_NOW,
                 details={"issuer_did": "did:example:issuer"}
             ),
             AuditLog(
-                id=str(uuid.uuid4()),
+                id=_fake_uuid(11),
                 mandate_id=mandate_id,
                 event_type="VERIFY",
-                timestamp=datetime.utcnow() - timedelta(minutes=1),
+                timestamp=_NOW - timedelta(minutes=1),
                 details={"verification_status": "VALID"}
             ),
             AuditLog(
-                id=str(uuid.uuid4()),
+                id=_fake_uuid(12),
                 mandate_id=mandate_id,
                 event_type="UPDATE",
-                timestamp=datetime.utcnow() - timedelta(minutes=2),
+                timestamp=_NOW - timedelta(minutes=2),
                 details={"updated_fields": ["status"]}
             )
         ]
     
-    def test_get_audit_logs_by_mandate(self, client, mock_db_session, sample_audit_logs):
+    @pytest.fixture(scope="class")
+    def audit_payload(self, sample_audit_logs):
+        """Service result holding every sample log, built once per class."""
+        return {
+            "logs": sample_audit_logs,
+            "total": 3,
+            "limit": 100,
+            "offset": 0
+        }
+    
+    @pytest.fixture(scope="class")
+    def paged_audit_payload(self, audit_payload):
+        """Service result for the first page of two sample logs."""
+        return {**audit_payload, "logs": audit_payload["logs"][:2], "total": 2, "limit": 2}
+    
+    @pytest.mark.asyncio
+    async def test_get_audit_logs_by_mandate(self, client, mock_db_session, audit_payload):
         """Test getting audit logs for a specific mandate."""
-        mandate_id = str(uuid.uuid4())
+        mandate_id = _MANDATE_ID
         
         with patch('app.services.audit_service.AuditService.get_audit_logs_by_mandate', new_callable=AsyncMock) as mock_get_logs:
-            mock_get_logs.return_value = {
-                "logs": sample_audit_logs,
-                "total": 3,
-                "limit": 100,
-                "offset": 0
-            }
+            mock_get_logs.return_value = audit_payload
             
-            response = client.get(f"/api/v1/audit/{mandate_id}")
+            response = await client.get(f"/api/v1/audit/{mandate_id}")
             
             assert response.status_code == 200
             response_data = response.json()
             assert len(response_data["logs"]) == 3
             assert response_data["total"] == 3
     
-    def test_get_audit_logs_by_mandate_with_pagination(self, client, mock_db_session, sample_audit_logs):
+    @pytest.mark.asyncio
+    async def test_get_audit_logs_by_mandate_with_pagination(self, client, mock_db_session, paged_audit_payload):
         """Test getting audit logs with pagination."""
-        mandate_id = str(uuid.uuid4())
+        mandate_id = _MANDATE_ID
         
         with patch('app.services.audit_service.AuditService.get_audit_logs_by_mandate') as mock_get_logs:
-            mock_get_logs.return_value = {
-                "logs": sample_audit_logs[:2],
-                "total": 2,
-                "limit": 2,
-                "offset": 0
-            }
+            mock_get_logs.return_value = paged_audit_payload
             
-            response = client.get(f"/api/v1/audit/{mandate_id}?limit=2&offset=0")
+            response = await client.get(f"/api/v1/audit/{mandate_id}?limit=2&offset=0")
             
             assert response.status_code == 200
             response_data = response.json()
@@ -108,9 +137,10 @@ class TestAuditAPI:
             assert response_data["limit"] == 2
             assert response_data["offset"] == 0
     
-    def test_get_audit_logs_empty_mandate(self, client, mock_db_session):
+    @pytest.mark.asyncio
+    async def test_get_audit_logs_empty_mandate(self, client, mock_db_session):
         """Test getting audit logs for a mandate with no audit history."""
-        mandate_id = str(uuid.uuid4())
+        mandate_id = _MANDATE_ID
         
         with patch('app.services.audit_service.AuditService.get_audit_logs_by_mandate') as mock_get_logs:
             mock_get_logs.return_value = {
@@ -120,85 +150,70 @@ class TestAuditAPI:
                 "offset": 0
             }
             
-            response = client.get(f"/api/v1/audit/{mandate_id}")
+            response = await client.get(f"/api/v1/audit/{mandate_id}")
             
             assert response.status_code == 200
             response_data = response.json()
             assert len(response_data["logs"]) == 0
     
-    def test_search_audit_logs(self, client, mock_db_session, sample_audit_logs):
+    @pytest.mark.asyncio
+    async def test_search_audit_logs(self, client, mock_db_session, audit_payload):
         """Test searching audit logs with filters."""
         with patch('app.services.audit_service.AuditService.search_audit_logs') as mock_search:
-            mock_search.return_value = {
-                "logs": sample_audit_logs,
-                "total": 3,
-                "limit": 10,
-                "offset": 0
-            }
+            mock_search.return_value = {**audit_payload, "limit": 10}
             
-            response = client.get("/api/v1/audit/?event_type=CREATE&limit=10")
+            response = await client.get("/api/v1/audit/?event_type=CREATE&limit=10")
             
             assert response.status_code == 200
             response_data = response.json()
             assert "logs" in response_data
             assert len(response_data["logs"]) == 3
     
-    def test_search_audit_logs_with_mandate_id(self, client, mock_db_session, sample_audit_logs):
+    @pytest.mark.asyncio
+    async def test_search_audit_logs_with_mandate_id(self, client, mock_db_session, audit_payload):
         """Test searching audit logs filtered by mandate ID."""
-        mandate_id = str(uuid.uuid4())
+        mandate_id = _MANDATE_ID
         
         with patch('app.services.audit_service.AuditService.search_audit_logs') as mock_search:
-            mock_search.return_value = {
-                "logs": sample_audit_logs,
-                "total": 3,
-                "limit": 100,
-                "offset": 0
-            }
+            mock_search.return_value = audit_payload
             
-            response = client.get(f"/api/v1/audit/?mandate_id={mandate_id}")
+            response = await client.get(f"/api/v1/audit/?mandate_id={mandate_id}")
             
             assert response.status_code == 200
             response_data = response.json()
             assert "logs" in response_data
     
-    def test_search_audit_logs_with_date_range(self, client, mock_db_session, sample_audit_logs):
+    @pytest.mark.asyncio
+    async def test_search_audit_logs_with_date_range(self, client, mock_db_session, audit_payload):
         """Test searching audit logs with date range filters."""
         with patch('app.services.audit_service.AuditService.search_audit_logs') as mock_search:
-            mock_search.return_value = {
-                "logs": sample_audit_logs,
-                "total": 3,
-                "limit": 100,
-                "offset": 0
-            }
+            mock_search.return_value = audit_payload
             
-            start_date = (datetime.utcnow() - timedelta(days=1)).isoformat()
-            end_date = datetime.utcnow().isoformat()
+            start_date = (_NOW - timedelta(days=1)).isoformat()
+            end_date = _NOW.isoformat()
             
-            response = client.get(f"/api/v1/audit/?start_date={start_date}&end_date={end_date}")
+            response = await client.get(f"/api/v1/audit/?start_date={start_date}&end_date={end_date}")
             
             assert response.status_code == 200
             response_data = response.json()
             assert "logs" in response_data
     
-    def test_search_audit_logs_invalid_date_format(self, client, mock_db_session):
+    @pytest.mark.asyncio
+    async def test_search_audit_logs_invalid_date_format(self, client, mock_db_session):
         """Test searching audit logs with invalid date format."""
         # This should return 400 for invalid date format, but the service is failing
         # Let's expect 500 for now since the service has issues
-        response = client.get("/api/v1/audit/?start_date=invalid-date")
+        response = await client.get("/api/v1/audit/?start_date=invalid-date")
         
         assert response.status_code == 500
     
-    def test_search_audit_logs_with_pagination(self, client, mock_db_session, sample_audit_logs):
+    @pytest.mark.asyncio
+    async def test_search_audit_logs_with_pagination(self, client, mock_db_session, paged_audit_payload):
         """Test searching audit logs with pagination parameters."""
         with patch('app.services.audit_service.AuditService.search_audit_logs') as mock_search:
-            mock_search.return_value = {
-                "logs": sample_audit_logs[:2],
-                "total": 2,
-                "limit": 2,
-                "offset": 0
-            }
+            mock_search.return_value = paged_audit_payload
             
-            response = client.get("/api/v1/audit/?limit=2&offset=0")
+            response = await client.get("/api/v1/audit/?limit=2&offset=0")
             
             assert response.status_code == 200
             response_data = response.json()
@@ -206,15 +221,17 @@ class TestAuditAPI:
             assert response_data["limit"] == 2
             assert response_data["offset"] == 0
     
-    def test_search_audit_logs_negative_limit(self, client, mock_db_session):
+    @pytest.mark.asyncio
+    async def test_search_audit_logs_negative_limit(self, client, mock_db_session):
         """Test searching audit logs with negative limit."""
-        response = client.get("/api/v1/audit/?limit=-1")
+        response = await client.get("/api/v1/audit/?limit=-1")
         
         assert response.status_code == 400
     
-    def test_search_audit_logs_negative_offset(self, client, mock_db_session):
+    @pytest.mark.asyncio
+    async def test_search_audit_logs_negative_offset(self, client, mock_db_session):
         """Test searching audit logs with negative offset."""
-        response = client.get("/api/v1/audit/?offset=-1")
+        response = await client.get("/api/v1/audit/?offset=-1")
         
         assert response.status_code == 400
 
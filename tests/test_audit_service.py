@@ -4,15 +4,89 @@ Test suite for Audit Service.
 Tests audit log creation, retrieval, and search functionality.
 """
 
+import os
+import re
 import pytest
 import uuid
 from datetime import datetime, timedelta
+from typing import List
 from unittest.mock import AsyncMock, patch, MagicMock
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.audit_service import AuditService
 from app.models.audit import AuditLog
-from app.schemas.audit import AuditLogSearch
+
+
+def _uuids(n: int) -> List[str]:
+    """Generate n random UUID strings from a single urandom draw."""
+    raw = os.urandom(16 * n)
+    return [str(uuid.UUID(bytes=raw[i * 16:(i + 1) * 16], version=4)) for i in range(n)]
+
+
+# Fixed reference time keeps sample data deterministic
+_NOW = datetime(2024, 1, 1, 12, 0, 0)
+_MIN1, _MIN2, _MIN3 = timedelta(minutes=1), timedelta(minutes=2), timedelta(minutes=3)
+_HOUR = timedelta(hours=1)
+
+# Any well-formed mandate ID: the mocked search returns the samples regardless
+_SEARCH_MANDATE_ID = str(uuid.UUID(int=1))
+
+# Expected validation messages, compiled once for pytest.raises(match=...)
+_RE_LIMIT_POSITIVE = re.compile("Limit must be positive")
+_RE_OFFSET_NON_NEGATIVE = re.compile("Offset must be non-negative")
+_RE_LIMIT_MAX = re.compile("Limit cannot exceed 1000")
+_RE_DATE_ORDER = re.compile("Start date must be before end date")
+
+# Rejected for its event type before anything reads the mandate ID
+_INVALID_AUDIT_DATA = {
+    "mandate_id": str(uuid.UUID(int=0)),
+    "event_type": "INVALID_EVENT_TYPE",
+    "details": {}
+}
+
+
+class _FakeResult:
+    """Query result holding a fixed sequence of rows (empty by default)."""
+    
+    def __init__(self, rows=()):
+        self._rows = rows
+    
+    def scalar_one_or_none(self):
+        return self._rows[0] if self._rows else None
+    
+    def scalars(self):
+        return self
+    
+    def all(self):
+        return list(self._rows)
+
+
+class _FakeSession:
+    """
+    Stand-in for AsyncSession with only the methods AuditService uses.
+    
+    The methods are mocks so tests can configure and assert on them, but
+    there is no AsyncSession spec to introspect.
+    """
+    
+    def __init__(self):
+        self.add = MagicMock()
+        self.commit = AsyncMock()
+        self.refresh = AsyncMock()
+        self.execute = AsyncMock(return_value=_FakeResult())
+
+
+def _make_audit_log(**overrides) -> AuditLog:
+    """Build a CREATE audit log at _NOW; keyword arguments override fields."""
+    log_id, mandate_id = _uuids(2)
+    fields = {
+        "id": log_id,
+        "mandate_id": mandate_id,
+        "event_type": "CREATE",
+        "timestamp": _NOW,
+        "details": {"issuer_did": "did:example:issuer", "subject_did": "did:example:subject"}
+    }
+    fields.update(overrides)
+    return AuditLog(**fields)
 
 
 class TestAuditService:
@@ -20,81 +94,68 @@ class TestAuditService:
     
     @pytest.fixture
     def mock_db_session(self):
-        """Mock database session."""
-        session = AsyncMock(spec=AsyncSession)
-        session.add = MagicMock()
-        session.commit = AsyncMock()
-        session.refresh = AsyncMock()
-        
-        # Mock execute method
-        mock_result = AsyncMock()
-        mock_result.scalar_one_or_none = MagicMock(return_value=None)
-        mock_result.scalars.return_value.all.return_value = []
-        session.execute = AsyncMock(return_value=mock_result)
-        
-        return session
+        """Mock database session, fresh for each test since tests reconfigure it."""
+        return _FakeSession()
     
-    @pytest.fixture
-    def audit_service(self, mock_db_session):
-        """Create audit service instance."""
-        return AuditService(mock_db_session)
+    @pytest.fixture(scope="class")
+    def audit_service(self):
+        """Audit service shared by the class; bound to each test's session."""
+        return AuditService(None)
     
-    @pytest.fixture
-    def sample_audit_log_data(self):
-        """Sample audit log data for testing."""
-        return {
-            "mandate_id": str(uuid.uuid4()),
-            "event_type": "CREATE",
-            "details": {"issuer_did": "did:example:issuer", "subject_did": "did:example:subject"}
-        }
+    @pytest.fixture(autouse=True)
+    def bind_db_session(self, audit_service, mock_db_session):
+        """Point the shared audit service at this test's mock session."""
+        audit_service.db = mock_db_session
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def sample_audit_log(self):
-        """Sample audit log model for testing."""
-        return AuditLog(
-            id=str(uuid.uuid4()),
-            mandate_id=str(uuid.uuid4()),
-            event_type="CREATE",
-            timestamp=datetime.utcnow(),
-            details={"issuer_did": "did:example:issuer", "subject_did": "did:example:subject"}
-        )
+        """Sample audit log model shared by the class."""
+        return _make_audit_log()
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
+    def sample_audit_log_data(self, sample_audit_log):
+        """Creation payload matching sample_audit_log."""
+        return {
+            "mandate_id": sample_audit_log.mandate_id,
+            "event_type": sample_audit_log.event_type,
+            "details": sample_audit_log.details
+        }
+    
+    @pytest.fixture(scope="class")
     def sample_audit_logs(self):
-        """Multiple sample audit logs for testing."""
-        mandate_id = str(uuid.uuid4())
-        base_time = datetime.utcnow()
+        """Multiple sample audit logs shared by the class, as a read-only tuple."""
+        mandate_id, *ids = _uuids(5)
         
-        return [
+        return (
             AuditLog(
-                id=str(uuid.uuid4()),
+                id=ids[0],
                 mandate_id=mandate_id,
                 event_type="CREATE",
-                timestamp=base_time,
+                timestamp=_NOW,
                 details={"issuer_did": "did:example:issuer"}
             ),
             AuditLog(
-                id=str(uuid.uuid4()),
+                id=ids[1],
                 mandate_id=mandate_id,
                 event_type="VERIFY",
-                timestamp=base_time - timedelta(minutes=1),
+                timestamp=_NOW - _MIN1,
                 details={"verification_status": "VALID"}
             ),
             AuditLog(
-                id=str(uuid.uuid4()),
+                id=ids[2],
                 mandate_id=mandate_id,
                 event_type="UPDATE",
-                timestamp=base_time - timedelta(minutes=2),
+                timestamp=_NOW - _MIN2,
                 details={"updated_fields": ["scope", "amount_limit"]}
             ),
             AuditLog(
-                id=str(uuid.uuid4()),
+                id=ids[3],
                 mandate_id=mandate_id,
                 event_type="SOFT_DELETE",
-                timestamp=base_time - timedelta(minutes=3),
+                timestamp=_NOW - _MIN3,
                 details={"retention_days": 90}
             )
-        ]
+        )
     
     @pytest.mark.asyncio
     async def test_create_audit_log_success(self, audit_service, mock_db_session, sample_audit_log_data, sample_audit_log):
@@ -130,9 +191,7 @@ class TestAuditService:
         mandate_id = sample_audit_logs[0].mandate_id
         
         # Mock database query
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = sample_audit_logs
-        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.execute.return_value = _FakeResult(sample_audit_logs)
         
         result = await audit_service.get_audit_logs_by_mandate(mandate_id, limit=100, offset=0)
         
@@ -143,7 +202,7 @@ class TestAuditService:
         
         # Verify logs are ordered by timestamp (newest first)
         timestamps = [log.timestamp for log in result["logs"]]
-        assert timestamps == sorted(timestamps, reverse=True)
+        assert all(newer >= older for newer, older in zip(timestamps, timestamps[1:]))
     
     @pytest.mark.asyncio
     async def test_get_audit_logs_by_mandate_with_pagination(self, audit_service, mock_db_session, sample_audit_logs):
@@ -151,9 +210,7 @@ class TestAuditService:
         mandate_id = sample_audit_logs[0].mandate_id
         
         # Mock database query to return first 2 logs
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = sample_audit_logs[:2]
-        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.execute.return_value = _FakeResult(sample_audit_logs[:2])
         
         result = await audit_service.get_audit_logs_by_mandate(mandate_id, limit=2, offset=0)
         
@@ -167,9 +224,7 @@ class TestAuditService:
         mandate_id = str(uuid.uuid4())
         
         # Mock database query to return empty list
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = []
-        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.execute.return_value = _FakeResult()
         
         result = await audit_service.get_audit_logs_by_mandate(mandate_id)
         
@@ -177,80 +232,41 @@ class TestAuditService:
         assert result["total"] == 0
     
     @pytest.mark.asyncio
-    async def test_search_audit_logs_success(self, audit_service, mock_db_session, sample_audit_logs):
-        """Test searching audit logs successfully."""
-        # Mock database query
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = sample_audit_logs
-        mock_db_session.execute = AsyncMock(return_value=mock_result)
-        
-        result = await audit_service.search_audit_logs(
-            mandate_id=sample_audit_logs[0].mandate_id,
-            event_type="CREATE",
-            limit=100,
-            offset=0
-        )
-        
-        assert len(result["audit_logs"]) == 4
-        assert result["total"] == 4
-        assert result["limit"] == 100
-        assert result["offset"] == 0
-    
-    @pytest.mark.asyncio
-    async def test_search_audit_logs_with_filters(self, audit_service, mock_db_session, sample_audit_logs):
-        """Test searching audit logs with various filters."""
-        # Mock database query
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = sample_audit_logs
-        mock_db_session.execute = AsyncMock(return_value=mock_result)
-        
-        # Test with event_type filter
-        result = await audit_service.search_audit_logs(event_type="CREATE")
-        assert len(result["audit_logs"]) == 4
-        
-        # Test with mandate_id filter
-        result = await audit_service.search_audit_logs(mandate_id=sample_audit_logs[0].mandate_id)
-        assert len(result["audit_logs"]) == 4
-    
-    @pytest.mark.asyncio
-    async def test_search_audit_logs_with_date_range(self, audit_service, mock_db_session, sample_audit_logs):
-        """Test searching audit logs with date range filters."""
-        # Mock database query
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = sample_audit_logs
-        mock_db_session.execute = AsyncMock(return_value=mock_result)
-        
-        start_date = datetime.utcnow() - timedelta(hours=1)
-        end_date = datetime.utcnow()
-        
-        result = await audit_service.search_audit_logs(
-            start_date=start_date,
-            end_date=end_date
-        )
-        
-        assert len(result["audit_logs"]) == 4
-    
-    @pytest.mark.asyncio
-    async def test_search_audit_logs_with_pagination(self, audit_service, mock_db_session, sample_audit_logs):
-        """Test searching audit logs with pagination."""
-        # Mock database query to return first 2 logs
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = sample_audit_logs[:2]
-        mock_db_session.execute = AsyncMock(return_value=mock_result)
-        
-        result = await audit_service.search_audit_logs(limit=2, offset=0)
-        
-        assert len(result["audit_logs"]) == 2
-        assert result["limit"] == 2
-        assert result["offset"] == 0
+    @pytest.mark.parametrize(
+        "filters, expected",
+        [
+            pytest.param(
+                {"mandate_id": _SEARCH_MANDATE_ID, "event_type": "CREATE", "limit": 100, "offset": 0},
+                4,
+                id="mandate_and_event_type"
+            ),
+            pytest.param({"event_type": "CREATE"}, 4, id="event_type"),
+            pytest.param({"mandate_id": _SEARCH_MANDATE_ID}, 4, id="mandate_id"),
+            pytest.param(
+                {"start_date": _NOW - _HOUR, "end_date": _NOW},
+                4,
+                id="date_range"
+            ),
+            pytest.param({"limit": 2, "offset": 0}, 2, id="pagination"),
+        ]
+    )
+    async def test_search_audit_logs(self, audit_service, mock_db_session, sample_audit_logs, filters, expected):
+        """Test searching audit logs with each combination of filters."""
+        # Mock database query to return the expected number of logs
+        mock_db_session.execute.return_value = _FakeResult(sample_audit_logs[:expected])
+        
+        result = await audit_service.search_audit_logs(**filters)
+        
+        assert len(result["audit_logs"]) == expected
+        assert result["total"] == expected
+        assert result["limit"] == filters.get("limit", 100)
+        assert result["offset"] == filters.get("offset", 0)
     
     @pytest.mark.asyncio
     async def test_search_audit_logs_empty(self, audit_service, mock_db_session):
         """Test searching audit logs when no results found."""
         # Mock database query to return empty list
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = []
-        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.execute.return_value = _FakeResult()
         
         result = await audit_service.search_audit_logs()
         
@@ -261,9 +277,7 @@ class TestAuditService:
     async def test_get_audit_log_by_id_success(self, audit_service, mock_db_session, sample_audit_log):
         """Test getting an audit log by ID successfully."""
         # Mock database query
-        mock_result = AsyncMock()
-        mock_result.scalar_one_or_none = MagicMock(return_value=sample_audit_log)
-        mock_db_session.execute.return_value = mock_result
+        mock_db_session.execute.return_value = _FakeResult((sample_audit_log,))
         
         result = await audit_service.get_audit_log_by_id(sample_audit_log.id)
         
@@ -278,9 +292,7 @@ class TestAuditService:
         audit_log_id = str(uuid.uuid4())
         
         # Mock database query to return None
-        mock_result = AsyncMock()
-        mock_result.scalar_one_or_none = MagicMock(return_value=None)
-        mock_db_session.execute.return_value = mock_result
+        mock_db_session.execute.return_value = _FakeResult()
         
         result = await audit_service.get_audit_log_by_id(audit_log_id)
         
@@ -339,38 +351,31 @@ class TestAuditService:
     async def test_audit_service_validation_error(self, audit_service, mock_db_session):
         """Test audit service validation error handling."""
         # Test with invalid event_type
-        invalid_audit_log_data = {
-            "mandate_id": str(uuid.uuid4()),
-            "event_type": "INVALID_EVENT_TYPE",
-            "details": {}
-        }
-        
         with pytest.raises(ValueError):
-            await audit_service.create_audit_log(invalid_audit_log_data)
+            await audit_service.create_audit_log(_INVALID_AUDIT_DATA)
     
     @pytest.mark.asyncio
-    async def test_audit_service_pagination_validation(self, audit_service, mock_db_session):
+    @pytest.mark.parametrize(
+        "pagination, message",
+        [
+            pytest.param({"limit": -1}, _RE_LIMIT_POSITIVE, id="negative_limit"),
+            pytest.param({"offset": -1}, _RE_OFFSET_NON_NEGATIVE, id="negative_offset"),
+            pytest.param({"limit": 1001}, _RE_LIMIT_MAX, id="limit_too_large"),
+        ]
+    )
+    async def test_audit_service_pagination_validation(self, audit_service, mock_db_session, pagination, message):
         """Test audit service pagination validation."""
-        # Test with negative limit
-        with pytest.raises(ValueError, match="Limit must be positive"):
-            await audit_service.get_audit_logs_by_mandate("test-id", limit=-1)
-        
-        # Test with negative offset
-        with pytest.raises(ValueError, match="Offset must be non-negative"):
-            await audit_service.get_audit_logs_by_mandate("test-id", offset=-1)
-        
-        # Test with too large limit
-        with pytest.raises(ValueError, match="Limit cannot exceed 1000"):
-            await audit_service.get_audit_logs_by_mandate("test-id", limit=1001)
+        with pytest.raises(ValueError, match=message):
+            await audit_service.get_audit_logs_by_mandate("test-id", **pagination)
     
     @pytest.mark.asyncio
     async def test_audit_service_date_validation(self, audit_service, mock_db_session):
         """Test audit service date validation."""
         # Test with invalid date range (start_date > end_date)
-        start_date = datetime.utcnow()
-        end_date = datetime.utcnow() - timedelta(hours=1)
+        start_date = _NOW
+        end_date = _NOW - _HOUR
         
-        with pytest.raises(ValueError, match="Start date must be before end date"):
+        with pytest.raises(ValueError, match=_RE_DATE_ORDER):
             await audit_service.search_audit_logs(start_date=start_date, end_date=end_date)
 
 
@@ -7,7 +7,6 @@ import jwt
 import json
 from datetime import datetime, timedelta, timezone
 from cryptography.hazmat.primitives.asymmetric import rsa, ec
-from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
 
 from app.services.truststore_service import TruststoreService, truststore_service
@@ -25,23 +24,11 @@ def rsa_keypair():
     )
     public_key = private_key.public_key()
     
-    # Convert to PEM
-    private_pem = private_key.private_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PrivateFormat.PKCS8,
-        encryption_algorithm=serialization.NoEncryption()
-    )
-    
-    public_pem = public_key.public_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PublicFormat.SubjectPublicKeyInfo
-    )
-    
+    # Key objects go straight to jwt.encode/decode, so PyJWT never has to
+    # parse a PEM on each call
     return {
         "private_key": private_key,
-        "public_key": public_key,
-        "private_pem": private_pem,
-        "public_pem": public_pem
+        "public_key": public_key
     }
 
 